@@ -3,180 +3,436 @@
 Extract and decode iMessage text messages from chat.db database.
 """
 
+import re
 import sqlite3
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from bpylist2 import archiver
 
+# Number of output lines to collect before writing them to stdout
+OUTPUT_BATCH_SIZE = 1000
 
-def extract_messages(db_path: str, chat_identifier: str, debug: bool = False):
+# Number of message rows sent to a worker process at a time with --jobs
+DECODE_CHUNK_SIZE = 1000
+
+# Read-side tuning applied to every connection: memory-map up to 1 GB of the
+# database, use a 128 MB page cache, and keep temporary sort tables in memory
+CONNECTION_PRAGMAS = [
+    'PRAGMA mmap_size=1073741824',
+    'PRAGMA cache_size=-131072',
+    'PRAGMA temp_store=MEMORY',
+]
+
+# Messages in a chat, oldest first
+MESSAGES_QUERY = """
+SELECT 
+    message.ROWID,
+    message.text,
+    length(message.attributedBody),
+    datetime(message.date/1000000000 + strftime("%s", "2001-01-01"), "unixepoch", "localtime") as date,
+    CASE message.is_from_me WHEN 1 THEN 'Me' ELSE 'Them' END as sender
+FROM message
+JOIN chat_message_join ON message.ROWID = chat_message_join.message_id
+JOIN chat ON chat_message_join.chat_id = chat.ROWID
+WHERE chat.chat_identifier = ?
+ORDER BY message.date ASC
+"""
+
+# Used to read a single attributedBody where Connection.blobopen() is missing
+ATTRIBUTED_BODY_QUERY = "SELECT attributedBody FROM message WHERE ROWID = ?"
+
+MESSAGE_COUNT_QUERY = """
+SELECT COUNT(*)
+FROM message
+JOIN chat_message_join ON message.ROWID = chat_message_join.message_id
+JOIN chat ON chat_message_join.chat_id = chat.ROWID
+WHERE chat.chat_identifier = ?
+"""
+
+# All chats with their message counts, busiest first
+CHATS_QUERY = """
+SELECT chat.chat_identifier, COUNT(*) as message_count
+FROM chat
+JOIN chat_message_join ON chat.ROWID = chat_message_join.chat_id
+GROUP BY chat.chat_identifier
+ORDER BY message_count DESC
+"""
+
+# Metadata strings that show up in attributedBody blobs but are never message text
+SKIP_KEYWORDS = [
+    'streamtyped', 'NSString', 'NSAttributedString', 'NSMutableString',
+    'NSMutableAttributedString',
+    '__kIM', 'AttributeName', 'NSData', 'bplist', 'RelativeDay',
+    'DateTime', 'NSNumber', 'NSDate', 'NSURL', 'NSValue'
+]
+SKIP_KEYWORDS_RE = re.compile(b'|'.join(re.escape(keyword.encode()) for keyword in SKIP_KEYWORDS))
+
+# attributedBody formats: NSKeyedArchiver property lists, which bpylist2 can
+# decode, and NeXTSTEP typedstreams, which is what Messages normally writes
+BPLIST_MAGIC = b'bplist00'
+STREAMTYPED_MAGIC = b'\x04\x0bstreamtyped'
+
+# In a typedstream, the NSString or NSMutableString class name is followed by
+# the rest of its class chain, then the "+" type code and the length-prefixed
+# UTF-8 string
+NSSTRING_CLASS_RE = re.compile(rb'NS(?:Mutable)?String')
+STRING_TYPE_MARKER = b'\x84\x01+'
+
+# Any well-formed multi-byte UTF-8 sequence (no overlongs or surrogates)
+UTF8_MULTIBYTE = (
+    rb'[\xc2-\xdf][\x80-\xbf]'
+    rb'|\xe0[\xa0-\xbf][\x80-\xbf]'
+    rb'|[\xe1-\xec\xee\xef][\x80-\xbf]{2}'
+    rb'|\xed[\x80-\x9f][\x80-\xbf]'
+    rb'|\xf0[\x90-\xbf][\x80-\xbf]{2}'
+    rb'|[\xf1-\xf3][\x80-\xbf]{3}'
+    rb'|\xf4[\x80-\x8f][\x80-\xbf]{2}'
+)
+# One encoded text character, and the same excluding the space
+UTF8_CHAR = rb'(?:[\x20-\x7e]|' + UTF8_MULTIBYTE + rb')'
+UTF8_VISIBLE_CHAR = rb'(?:[\x21-\x7e]|' + UTF8_MULTIBYTE + rb')'
+
+# A run of at least 6 characters of valid UTF-8 text that starts and ends on a
+# non-space character, so matches come out already stripped. Line breaks are
+# allowed inside the run. Matching this in the regex engine keeps the
+# byte-by-byte scan in C instead of the Python interpreter.
+TEXT_RUN_RE = re.compile(
+    UTF8_VISIBLE_CHAR + rb'(?:' + UTF8_CHAR + rb'|[\n\r]){4,}' + UTF8_VISIBLE_CHAR
+)
+
+# Runs made up only of digits and spaces, like phone numbers and timestamps
+DIGITS_ONLY_RE = re.compile(rb'[0-9 ]+')
+
+
+def _decode_streamtyped(attributed_body: bytes):
     """
-    Extract messages from a specific chat in the iMessage database.
-    
-    Args:
-        db_path: Path to the chat.db file
-        chat_identifier: Chat identifier (phone number or email)
+    Read the message text straight out of a typedstream attributedBody.
+
+    Returns None if the blob doesn't have the expected NSString layout, so the
+    caller can fall back to _longest_candidate().
     """
+    match = NSSTRING_CLASS_RE.search(attributed_body)
+    if not match:
+        return None
+    # NSMutableString is followed by its NSString superclass record, so don't
+    # assume the type code sits a fixed distance after the class name
+    marker = attributed_body.find(STRING_TYPE_MARKER, match.end())
+    if marker == -1:
+        return None
+
+    # Lengths under 0x80 are a single byte; 0x81 and 0x82 introduce a
+    # little-endian 16- or 32-bit length. Other high bytes are typedstream
+    # control tags, not lengths.
+    pos = marker + len(STRING_TYPE_MARKER)
+    if pos >= len(attributed_body):
+        return None
+    length = attributed_body[pos]
+    pos += 1
+    if length == 0x81:
+        length = int.from_bytes(attributed_body[pos:pos + 2], 'little')
+        pos += 2
+    elif length == 0x82:
+        length = int.from_bytes(attributed_body[pos:pos + 4], 'little')
+        pos += 4
+    elif length >= 0x80:
+        return None
+
+    payload = attributed_body[pos:pos + length]
+    if len(payload) != length:
+        return None
     try:
-        conn = sqlite3.connect(db_path)
+        return payload.decode('utf-8')
+    except UnicodeDecodeError:
+        return None
+
+
+def _longest_candidate(attributed_body: bytes):
+    """
+    Find the most likely message text in a raw attributedBody blob.
+
+    Used for typedstream blobs that _decode_streamtyped() can't parse, blobs in
+    unknown formats, and bplists bpylist2 fails on. Scans for UTF-8 text runs,
+    drops ones that look like metadata, and returns the longest remaining
+    candidate (or None if there isn't one).
+    """
+    # Track only the longest candidate, since it's most likely to be the actual
+    # message. Checks run on the blob in place, so only the winner is decoded.
+    best_start, best_end = 0, 0
+    for match in TEXT_RUN_RE.finditer(attributed_body):
+        start, end = match.span()
+        if end - start <= best_end - best_start:
+            continue
+        # Check if this looks like actual message text, not metadata
+        if SKIP_KEYWORDS_RE.search(attributed_body, start, end):
+            continue
+        # Also skip strings that are only numbers
+        if DIGITS_ONLY_RE.fullmatch(attributed_body, start, end):
+            continue
+        best_start, best_end = start, end
+
+    if best_end == 0:
+        return None
+    # TEXT_RUN_RE only matches well-formed UTF-8, so this can't fail
+    return attributed_body[best_start:best_end].decode('utf-8')
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    """Open the database read-only and apply CONNECTION_PRAGMAS, exiting with a hint on failure."""
+    # mode=ro skips the write-side locking and journal setup. immutable=1 is not
+    # used because Messages keeps recent messages in the WAL file, which SQLite
+    # ignores for immutable databases.
+    uri = Path(db_path).absolute().as_uri() + '?mode=ro'
+    try:
+        conn = sqlite3.connect(uri, uri=True)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
     except sqlite3.DatabaseError as e:
         print(f"Error connecting to database: {e}", file=sys.stderr)
         print("Please ensure your terminal application has 'Full Disk Access' in System Settings > Privacy & Security.", file=sys.stderr)
         sys.exit(1)
-    cursor = conn.cursor()
+    return conn
+
+
+def _read_attributed_body(conn: sqlite3.Connection, rowid: int) -> bytes:
+    """Read one message's attributedBody blob on demand."""
+    # Python 3.11+ can read the blob through SQLite's incremental blob API
+    if hasattr(conn, 'blobopen'):
+        with conn.blobopen('message', 'attributedBody', rowid, readonly=True) as blob:
+            return blob.read()
+    return conn.execute(ATTRIBUTED_BODY_QUERY, (rowid,)).fetchone()[0]
+
+
+def _has_usable_text(text) -> bool:
+    """Check whether the plain text field holds real message content."""
+    if not text:
+        return False
+    stripped = text.strip()
+    return stripped != '' and stripped != '￼'
+
+
+def _text_from_archive(decoded):
+    """Pull the message text out of an object decoded by bpylist2."""
+    # The decoded object is usually an NSAttributedString
+    string = getattr(decoded, 'string', None)
+    if string is not None:
+        return str(string)
+    attrs = getattr(decoded, '__dict__', None)
+    if attrs is not None:
+        # Look for common string keys
+        for key in ['NSString', 'string', 'text']:
+            if attrs.get(key):
+                return str(attrs[key])
+        # If still nothing, look for any string value
+        for value in attrs.values():
+            if isinstance(value, str) and value.strip():
+                return value
+        return None
+    if isinstance(decoded, str):
+        return decoded
+    return None
+
+
+def _decode_attributed_body(attributed_body: bytes):
+    """Get the message text from an attributedBody blob, or None if there is none."""
+    if attributed_body.startswith(BPLIST_MAGIC):
+        try:
+            return _text_from_archive(archiver.unarchive(attributed_body))
+        except Exception:
+            return _longest_candidate(attributed_body)
     
-    # Query to get messages from a specific chat
-    query = """
-    SELECT 
-        message.ROWID,
-        message.text,
-        message.attributedBody,
-        datetime(message.date/1000000000 + strftime("%s", "2001-01-01"), "unixepoch", "localtime") as date,
-        message.is_from_me
-    FROM message
-    JOIN chat_message_join ON message.ROWID = chat_message_join.message_id
-    JOIN chat ON chat_message_join.chat_id = chat.ROWID
-    WHERE chat.chat_identifier = ?
-    ORDER BY message.date ASC
-    """
+    # Messages writes attributedBody as a typedstream, which bpylist2 can't
+    # read. Pull the NSString out directly, and only scan for text when the
+    # blob doesn't have the expected layout.
+    message_text = None
+    if attributed_body.startswith(STREAMTYPED_MAGIC):
+        message_text = _decode_streamtyped(attributed_body)
+    if message_text is None:
+        message_text = _longest_candidate(attributed_body)
+    return message_text
+
+
+def _format_line(message_text, date, sender):
+    """Format one output line, or return None if the message has no text."""
+    if message_text and message_text.strip() != '￼':
+        return f"[{date}] {sender}: {message_text}\n"
+    return None
+
+
+def _process_row_fast(conn: sqlite3.Connection, row):
+    """Format one message row for output, or return None if it has no text."""
+    rowid, text, attributed_body_length, date, sender = row
     
-    cursor.execute(query, (chat_identifier,))
-    messages = cursor.fetchall()
+    # Use the plain text field when it has real content. Otherwise read and
+    # decode attributedBody, which is only fetched for these rows.
+    if _has_usable_text(text):
+        message_text = text
+    elif attributed_body_length:
+        message_text = _decode_attributed_body(_read_attributed_body(conn, rowid))
+    else:
+        return None
+    return _format_line(message_text, date, sender)
+
+
+def _decode_chunk(rows):
+    """
+    Format a chunk of (text, attributedBody, date, sender) rows in a worker process.
+
+    Each row carries either usable text or the attributedBody to decode, the
+    other being None; _iter_chunks() has already made that choice.
+    """
+    lines = []
+    for message_text, attributed_body, date, sender in rows:
+        if attributed_body is not None:
+            message_text = _decode_attributed_body(attributed_body)
+        line = _format_line(message_text, date, sender)
+        if line is not None:
+            lines.append(line)
+    return lines
+
+
+def _iter_chunks(conn: sqlite3.Connection, cursor):
+    """Group message rows into chunks for _decode_chunk, reading blobs that are needed."""
+    chunk = []
+    for rowid, text, attributed_body_length, date, sender in cursor:
+        if _has_usable_text(text):
+            chunk.append((text, None, date, sender))
+        elif attributed_body_length:
+            chunk.append((None, _read_attributed_body(conn, rowid), date, sender))
+        else:
+            continue
+        if len(chunk) >= DECODE_CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _decode_in_processes(conn: sqlite3.Connection, cursor, jobs: int):
+    """Yield formatted lines in order, decoding chunks of rows across worker processes."""
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        # Keep a couple of chunks per worker in flight rather than submitting
+        # the whole chat up front, so memory stays bounded
+        pending = deque()
+        for chunk in _iter_chunks(conn, cursor):
+            pending.append(executor.submit(_decode_chunk, chunk))
+            if len(pending) >= jobs * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _process_row_debug(conn: sqlite3.Connection, row):
+    """Like _process_row_fast, but print decoding details and show non-text rows."""
+    rowid, text, attributed_body_length, date, sender = row
     
-    print(f"Found {len(messages)} messages in chat: {chat_identifier}\n")
+    message_text = None
     
-    for row in messages:
-        rowid, text, attributed_body, date, is_from_me = row
-        sender = "Me" if is_from_me else "Them"
-        
-        # Try to decode attributedBody if it exists
-        message_text = None
-        
-        # First try to extract text from attributedBody using raw string extraction
-        if attributed_body and len(attributed_body) > 0:
+    if _has_usable_text(text):
+        message_text = text
+    elif attributed_body_length:
+        attributed_body = _read_attributed_body(conn, rowid)
+        if attributed_body.startswith(BPLIST_MAGIC):
             try:
-                # Try bpylist2 first
                 decoded = archiver.unarchive(attributed_body)
                 
-                if debug:
-                    print(f"\n=== DEBUG Message {rowid} ===")
-                    print(f"Type: {type(decoded)}")
-                    print(f"Has string attr: {hasattr(decoded, 'string')}")
-                    if hasattr(decoded, 'string'):
-                        print(f"String value: {decoded.string}")
-                        print(f"String type: {type(decoded.string)}")
-                    if hasattr(decoded, '__dict__'):
-                        print(f"Dict keys: {list(decoded.__dict__.keys())}")
-                        for key, value in decoded.__dict__.items():
-                            print(f"  {key}: {type(value)} = {repr(value)[:100]}")
-                    print("=" * 40)
-                
-                # The decoded object is usually an NSAttributedString
-                # Try different ways to extract the text
+                print(f"\n=== DEBUG Message {rowid} ===")
+                print(f"Type: {type(decoded)}")
+                print(f"Has string attr: {hasattr(decoded, 'string')}")
                 if hasattr(decoded, 'string'):
-                    message_text = str(decoded.string)
-                elif hasattr(decoded, '__dict__'):
-                    # Look for common string keys
-                    for key in ['NSString', 'string', 'text']:
-                        if key in decoded.__dict__ and decoded.__dict__[key]:
-                            message_text = str(decoded.__dict__[key])
-                            break
-                    # If still nothing, look for any string value
-                    if not message_text:
-                        for key, value in decoded.__dict__.items():
-                            if isinstance(value, str) and value.strip():
-                                message_text = value
-                                break
-                elif isinstance(decoded, str):
-                    message_text = decoded
+                    print(f"String value: {decoded.string}")
+                    print(f"String type: {type(decoded.string)}")
+                if hasattr(decoded, '__dict__'):
+                    print(f"Dict keys: {list(decoded.__dict__.keys())}")
+                    for key, value in decoded.__dict__.items():
+                        print(f"  {key}: {type(value)} = {repr(value)[:100]}")
+                print("=" * 40)
+                
+                message_text = _text_from_archive(decoded)
             except Exception as e:
                 # If bpylist2 fails, try to extract raw UTF-8 strings from the binary data
-                try:
-                    # The message text is often stored as a null-terminated or length-prefixed string
-                    # Look for strings that don't look like class names or attribute keys
-                    
-                    # Skip metadata keywords
-                    skip_keywords = [
-                        'streamtyped', 'NSString', 'NSAttributedString', 'NSMutableString',
-                        '__kIM', 'AttributeName', 'NSData', 'bplist', 'RelativeDay',
-                        'DateTime', 'NSNumber', 'NSDate', 'NSURL', 'NSValue'
-                    ]
-                    
-                    # Try to find the longest reasonable text string
-                    candidate_texts = []
-                    i = 0
-                    while i < len(attributed_body) - 4:
-                        # Look for printable ASCII/UTF-8 sequences
-                        if 32 <= attributed_body[i] <= 126:  # Printable ASCII range
-                            # Find the end of this string
-                            end = i
-                            while end < len(attributed_body) and ((32 <= attributed_body[end] <= 126) or attributed_body[end] in [10, 13]):
-                                end += 1
-                            
-                            if end > i + 5:  # At least 5 characters
-                                try:
-                                    potential = attributed_body[i:end].decode('utf-8', errors='strict').strip()
-                                    # Check if this looks like actual message text, not metadata
-                                    is_metadata = any(keyword in potential for keyword in skip_keywords)
-                                    # Also skip very short strings or strings that are mostly numbers
-                                    if not is_metadata and len(potential) > 5 and not potential.replace(' ', '').isdigit():
-                                        candidate_texts.append((len(potential), potential))
-                                except:
-                                    pass
-                            i = end
-                        else:
-                            i += 1
-                    
-                    # Use the longest candidate as it's most likely to be the actual message
-                    if candidate_texts:
-                        candidate_texts.sort(reverse=True)  # Sort by length descending
-                        message_text = candidate_texts[0][1]
-                except Exception as e2:
-                    pass
+                message_text = _longest_candidate(attributed_body)
                 
-                if debug:
-                    print(f"\n=== ERROR Message {rowid} ===")
-                    print(f"Error type: {type(e).__name__}")
-                    print(f"Error: {e}")
-                    print(f"AttributedBody length: {len(attributed_body)}")
-                    print(f"First 20 bytes: {attributed_body[:20]}")
-                    if message_text:
-                        print(f"Extracted text: {message_text[:100]}")
-        
-        # Fall back to plain text field if we still don't have text
-        if not message_text and text and text.strip() and text.strip() != '￼':
-            message_text = text
+                print(f"\n=== ERROR Message {rowid} ===")
+                print(f"Error type: {type(e).__name__}")
+                print(f"Error: {e}")
+                print(f"AttributedBody length: {len(attributed_body)}")
+                print(f"First 20 bytes: {attributed_body[:20]}")
+                if message_text:
+                    print(f"Extracted text: {message_text[:100]}")
+        else:
+            message_text = _decode_attributed_body(attributed_body)
+            
+            print(f"\n=== DEBUG Message {rowid} ===")
+            print(f"Streamtyped: {attributed_body.startswith(STREAMTYPED_MAGIC)}")
+            print(f"AttributedBody length: {len(attributed_body)}")
+            print(f"First 20 bytes: {attributed_body[:20]}")
+            if message_text:
+                print(f"Extracted text: {message_text[:100]}")
+            print("=" * 40)
+    
+    line = _format_line(message_text, date, sender)
+    if line is not None:
+        return line
+    # Only show non-text content in debug mode
+    return f"[{date}] {sender}: [non-text content]\n"
+
+
+def extract_messages(db_path: str, chat_identifier: str, debug: bool = False, jobs: int = 1):
+    """
+    Extract messages from a specific chat in the iMessage database.
+    
+    Args:
+        db_path: Path to the chat.db file
+        chat_identifier: Chat identifier (phone number or email)
+        debug: Print decoding details and list messages without text
+        jobs: Number of worker processes used to decode messages (ignored in debug mode)
+    """
+    conn = _connect(db_path)
+    cursor = conn.cursor()
+    
+    # Count up front so rows can be streamed instead of loaded all at once
+    cursor.execute(MESSAGE_COUNT_QUERY, (chat_identifier,))
+    message_count = cursor.fetchone()[0]
+    
+    print(f"Found {message_count} messages in chat: {chat_identifier}\n")
+    
+    # Stream rows from the cursor rather than loading the whole chat at once
+    cursor.execute(MESSAGES_QUERY, (chat_identifier,))
+    
+    # Collect output lines and write them in batches rather than one print()
+    # per message. Debug output is interleaved with message lines, so write
+    # through immediately in that mode to keep it in order.
+    output = []
+    batch_size = 1 if debug else OUTPUT_BATCH_SIZE
+    
+    if jobs > 1 and not debug:
+        lines = _decode_in_processes(conn, cursor, jobs)
+    else:
+        # Pick the row handler once so the common path carries no debug checks
+        process_row = _process_row_debug if debug else _process_row_fast
+        lines = (process_row(conn, row) for row in cursor)
+    
+    for line in lines:
+        if line is not None:
+            output.append(line)
         
-        # Print the message if we have any text
-        if message_text and message_text.strip() != '￼':
-            print(f"[{date}] {sender}: {message_text}")
-        elif debug:
-            # Only show non-text content in debug mode
-            print(f"[{date}] {sender}: [non-text content]")
+        if len(output) >= batch_size:
+            sys.stdout.write("".join(output))
+            output.clear()
     
+    sys.stdout.write("".join(output))
+    sys.stdout.flush()
     conn.close()
 
 
 def list_chats(db_path: str):
     """List all available chats in the database."""
-    try:
-        conn = sqlite3.connect(db_path)
-    except sqlite3.DatabaseError as e:
-        print(f"Error connecting to database: {e}", file=sys.stderr)
-        print("Please ensure your terminal application has 'Full Disk Access' in System Settings > Privacy & Security.", file=sys.stderr)
-        sys.exit(1)
+    conn = _connect(db_path)
     cursor = conn.cursor()
     
-    query = """
-    SELECT DISTINCT chat.chat_identifier, COUNT(message.ROWID) as message_count
-    FROM chat
-    JOIN chat_message_join ON chat.ROWID = chat_message_join.chat_id
-    JOIN message ON chat_message_join.message_id = message.ROWID
-    GROUP BY chat.chat_identifier
-    ORDER BY message_count DESC
-    """
-    
-    cursor.execute(query)
+    cursor.execute(CHATS_QUERY)
     chats = cursor.fetchall()
     
     print("Available chats:\n")
@@ -191,26 +447,48 @@ def main():
     # Default path to iMessage database on macOS
     default_db_path = str(Path.home() / "Library" / "Messages" / "chat.db")
     
-    if len(sys.argv) < 2:
+    # Options can appear anywhere, so keep them out of the positional arguments.
+    # Reject anything unrecognized rather than dropping it, so a value given as
+    # a separate argument (e.g. "--jobs 4") isn't taken as a positional.
+    args = [arg for arg in sys.argv if not arg.startswith("--")]
+    for arg in sys.argv[1:]:
+        if arg == "--jobs":
+            print("Error: --jobs needs a value, e.g. --jobs=4")
+            sys.exit(1)
+        if arg.startswith("--") and arg != "--debug" and not arg.startswith("--jobs="):
+            print(f"Error: unknown option: {arg}")
+            sys.exit(1)
+    
+    if len(args) < 2:
         print("Usage:")
         print(f"  {sys.argv[0]} list [db_path]")
-        print(f"  {sys.argv[0]} extract <chat_identifier> [db_path]")
+        print(f"  {sys.argv[0]} extract <chat_identifier> [db_path] [--debug] [--jobs=N]")
         print(f"\nDefault db_path: {default_db_path}")
         sys.exit(1)
     
-    command = sys.argv[1]
+    command = args[1]
     
     if command == "list":
-        db_path = sys.argv[2] if len(sys.argv) > 2 else str(default_db_path)
+        db_path = args[2] if len(args) > 2 else str(default_db_path)
         list_chats(db_path)
     elif command == "extract":
-        if len(sys.argv) < 3:
+        if len(args) < 3:
             print("Error: chat_identifier required for extract command")
             sys.exit(1)
-        chat_identifier = sys.argv[2]
-        db_path = sys.argv[3] if len(sys.argv) > 3 else str(default_db_path)
+        chat_identifier = args[2]
+        db_path = args[3] if len(args) > 3 else str(default_db_path)
         debug = "--debug" in sys.argv
-        extract_messages(db_path, chat_identifier, debug)
+        jobs = 1
+        for arg in sys.argv:
+            if arg.startswith("--jobs="):
+                try:
+                    jobs = int(arg[len("--jobs="):])
+                except ValueError:
+                    jobs = 0
+                if jobs < 1:
+                    print(f"Error: invalid job count: {arg}")
+                    sys.exit(1)
+        extract_messages(db_path, chat_identifier, debug, jobs)
     else:
         print(f"Unknown command: {command}")
         sys.exit(1)
@@ -8,7 +8,10 @@ from pathlib import Path
 from unittest.mock import patch, MagicMock
 import pytest
 
-from extract_messages import extract_messages, list_chats, main
+from extract_messages import (
+    extract_messages, list_chats, main, _connect, _decode_attributed_body, _decode_streamtyped,
+    _longest_candidate,
+)
 
 
 @pytest.fixture
@@ -115,6 +118,57 @@ class TestExtractMessages:
 
         assert 'Found 2 messages' in captured.out
 
+    def test_extract_messages_date_format(self, test_db, capsys):
+        """Test that dates match SQLite's local-time conversion of message.date."""
+        conn = sqlite3.connect(':memory:')
+        expected = conn.execute(
+            'SELECT datetime(1000000000/1000000000 + strftime("%s", "2001-01-01"), "unixepoch", "localtime")'
+        ).fetchone()[0]
+        conn.close()
+
+        extract_messages(test_db, '+15551234567')
+        captured = capsys.readouterr()
+
+        assert f'[{expected}] Them: Hi there' in captured.out
+
+    def test_extract_messages_orders_by_message_date(self, test_db, capsys):
+        """Test that messages are ordered by message.date, not the copy in chat_message_join."""
+        conn = sqlite3.connect(test_db)
+        cursor = conn.cursor()
+        cursor.execute("ALTER TABLE chat_message_join ADD COLUMN message_date INTEGER")
+        # The copied column can disagree with message.date (it defaults to 0)
+        cursor.execute("UPDATE chat_message_join SET message_date = 10 WHERE message_id = 1")
+        cursor.execute("UPDATE chat_message_join SET message_date = 5 WHERE message_id = 2")
+        conn.commit()
+        conn.close()
+
+        extract_messages(test_db, '+15551234567')
+        captured = capsys.readouterr()
+
+        assert captured.out.index('Hello') < captured.out.index('Hi there')
+
+    def test_extract_messages_parallel_matches_serial(self, test_db, capsys):
+        """Test that decoding in worker processes gives the same output in the same order."""
+        conn = sqlite3.connect(test_db)
+        for rowid in range(10, 40):
+            conn.execute("""
+                INSERT INTO message (ROWID, text, attributedBody, date, is_from_me)
+                VALUES (?, NULL, ?, ?, ?)
+            """, (rowid, make_streamtyped(f'message number {rowid}'), rowid * 1000000000, rowid % 2))
+            conn.execute("INSERT INTO chat_message_join (chat_id, message_id) VALUES (1, ?)", (rowid,))
+        conn.commit()
+        conn.close()
+
+        extract_messages(test_db, '+15551234567')
+        serial = capsys.readouterr().out
+
+        with patch('extract_messages.DECODE_CHUNK_SIZE', 7):
+            extract_messages(test_db, '+15551234567', jobs=2)
+        parallel = capsys.readouterr().out
+
+        assert 'message number 39' in serial
+        assert parallel == serial
+
     def test_extract_messages_invalid_db(self, capsys):
         """Test handling of invalid database path."""
         with pytest.raises(SystemExit) as exc_info:
@@ -159,6 +213,27 @@ class TestListChats:
         assert 'Error connecting to database' in captured.err
 
 
+class TestConnect:
+    """Tests for the _connect helper."""
+
+    def test_connect_is_read_only(self, test_db):
+        """Test that the database is opened read-only."""
+        conn = _connect(test_db)
+        try:
+            with pytest.raises(sqlite3.OperationalError):
+                conn.execute("INSERT INTO chat (ROWID, chat_identifier) VALUES (3, 'x')")
+        finally:
+            conn.close()
+
+    def test_connect_path_with_uri_characters(self, tmp_path):
+        """Test that paths containing URI special characters still open."""
+        db_path = tmp_path / 'chat #1?.db'
+        sqlite3.connect(db_path).close()
+
+        conn = _connect(str(db_path))
+        conn.close()
+
+
 class TestMain:
     """Tests for main function."""
 
@@ -184,14 +259,55 @@ class TestMain:
         with patch('sys.argv', ['extract_messages.py', 'extract', '+15551234567', test_db]):
             with patch('extract_messages.extract_messages') as mock_extract:
                 main()
-                mock_extract.assert_called_once_with(test_db, '+15551234567', False)
+                mock_extract.assert_called_once_with(test_db, '+15551234567', False, 1)
 
     def test_main_extract_with_debug(self, test_db):
         """Test main with extract command and debug flag."""
         with patch('sys.argv', ['extract_messages.py', 'extract', '+15551234567', test_db, '--debug']):
             with patch('extract_messages.extract_messages') as mock_extract:
                 main()
-                mock_extract.assert_called_once_with(test_db, '+15551234567', True)
+                mock_extract.assert_called_once_with(test_db, '+15551234567', True, 1)
+
+    def test_main_extract_with_jobs(self, test_db):
+        """Test main with extract command and a job count."""
+        with patch('sys.argv', ['extract_messages.py', 'extract', '--jobs=4', '+15551234567', test_db]):
+            with patch('extract_messages.extract_messages') as mock_extract:
+                main()
+                mock_extract.assert_called_once_with(test_db, '+15551234567', False, 4)
+
+    def test_main_extract_invalid_jobs(self, test_db, capsys):
+        """Test extract command with an invalid job count."""
+        with patch('sys.argv', ['extract_messages.py', 'extract', '+15551234567', test_db, '--jobs=zero']):
+            with pytest.raises(SystemExit) as exc_info:
+                main()
+
+            assert exc_info.value.code == 1
+            captured = capsys.readouterr()
+            assert 'invalid job count' in captured.out
+
+    def test_main_extract_jobs_without_value(self, capsys):
+        """Test that "--jobs 4" is rejected instead of taking 4 as the db path."""
+        with patch('sys.argv', ['extract_messages.py', 'extract', '+15551234567', '--jobs', '4']):
+            with patch('extract_messages.extract_messages') as mock_extract:
+                with pytest.raises(SystemExit) as exc_info:
+                    main()
+
+                assert exc_info.value.code == 1
+                mock_extract.assert_not_called()
+            captured = capsys.readouterr()
+            assert '--jobs needs a value' in captured.out
+
+    def test_main_unknown_option(self, capsys):
+        """Test that unrecognized options are rejected."""
+        with patch('sys.argv', ['extract_messages.py', 'list', '--verbose']):
+            with patch('extract_messages.list_chats') as mock_list:
+                with pytest.raises(SystemExit) as exc_info:
+                    main()
+
+                assert exc_info.value.code == 1
+                mock_list.assert_not_called()
+            captured = capsys.readouterr()
+            assert 'unknown option: --verbose' in captured.out
 
     def test_main_extract_no_identifier(self, capsys):
         """Test extract command without chat identifier."""
@@ -249,6 +365,43 @@ class TestAttributedBodyDecoding:
         # Should still complete without crashing
         assert 'Found 3 messages' in captured.out
 
+    def test_message_text_from_attributed_body(self, test_db, capsys):
+        """Test that text is recovered from attributedBody when the text field is empty."""
+        conn = sqlite3.connect(test_db)
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO message (ROWID, text, attributedBody, date, is_from_me)
+            VALUES (6, NULL, ?, 5000000000, 0)
+        """, (b'\x04\x0bstreamtyped\x84\x08NSString\x01\x94\x84\x01+\x0eRunning late!!\x86\x84',))
+        cursor.execute("INSERT INTO chat_message_join (chat_id, message_id) VALUES (1, 6)")
+        conn.commit()
+        conn.close()
+
+        extract_messages(test_db, '+15551234567')
+        captured = capsys.readouterr()
+
+        assert 'Them: Running late!!' in captured.out
+
+    def test_message_text_preferred_over_attributed_body(self, test_db, capsys):
+        """Test that a usable text field is used without decoding attributedBody."""
+        conn = sqlite3.connect(test_db)
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO message (ROWID, text, attributedBody, date, is_from_me)
+            VALUES (7, 'Plain text wins', ?, 6000000000, 1)
+        """, (b'\x01something else entirely\x02',))
+        cursor.execute("INSERT INTO chat_message_join (chat_id, message_id) VALUES (1, 7)")
+        conn.commit()
+        conn.close()
+
+        with patch('extract_messages._read_attributed_body') as mock_read:
+            extract_messages(test_db, '+15551234567')
+            mock_read.assert_not_called()
+        captured = capsys.readouterr()
+
+        assert 'Me: Plain text wins' in captured.out
+        assert 'something else entirely' not in captured.out
+
     def test_message_filtering_non_text(self, test_db, capsys):
         """Test that non-text content (like object replacement character) is filtered."""
         conn = sqlite3.connect(test_db)
@@ -269,3 +422,148 @@ class TestAttributedBodyDecoding:
 
         # The object replacement character should not appear in output
         assert '￼' not in captured.out or 'non-text content' in captured.out
+
+    def test_non_text_content_only_in_debug(self, test_db, capsys):
+        """Test that messages without text are listed only in debug mode."""
+        conn = sqlite3.connect(test_db)
+        conn.execute("""
+            INSERT INTO message (ROWID, text, attributedBody, date, is_from_me)
+            VALUES (9, NULL, NULL, 8000000000, 0)
+        """)
+        conn.execute("INSERT INTO chat_message_join (chat_id, message_id) VALUES (1, 9)")
+        conn.commit()
+        conn.close()
+
+        extract_messages(test_db, '+15551234567')
+        assert '[non-text content]' not in capsys.readouterr().out
+
+        extract_messages(test_db, '+15551234567', debug=True)
+        assert 'Them: [non-text content]' in capsys.readouterr().out
+
+
+class TestLongestCandidate:
+    """Tests for the raw attributedBody fallback scanner."""
+
+    def test_picks_longest_text_run(self):
+        """Test that the longest non-metadata run wins."""
+        blob = b'\x04\x0bstreamtyped\x81\xe8\x03\x84\x01@\x84\x84\x84\x12NSAttributedString\x00' \
+               b'\x84\x84\x08NSObject\x00\x85\x92\x84\x84\x84\x08NSString\x01\x94\x84\x01+' \
+               b'\x16See you at the park!\x86\x84\x02iI\x01\x16'
+        assert _longest_candidate(blob) == 'See you at the park!'
+
+    def test_skips_metadata_and_numbers(self):
+        """Test that metadata keywords and digit-only runs are ignored."""
+        blob = b'\x00__kIMMessagePartAttributeName\x00123 456 7890\x00'
+        assert _longest_candidate(blob) is None
+
+    def test_keeps_line_breaks(self):
+        """Test that line breaks inside a run are kept."""
+        blob = b'\x01first line\nsecond line\x02'
+        assert _longest_candidate(blob) == 'first line\nsecond line'
+
+    def test_skips_mutable_attributed_string_class(self):
+        """Test that the NSMutableAttributedString class name isn't taken as text."""
+        assert _longest_candidate(b'\x84\x19NSMutableAttributedString\x00\x84\x01') is None
+
+    def test_strips_surrounding_whitespace(self):
+        """Test that spaces and line breaks around a run are dropped."""
+        assert _longest_candidate(b'\x01   padded text \n\x02') == 'padded text'
+        assert _longest_candidate(b'\x01ab      \x02') is None
+
+    def test_non_ascii_text(self):
+        """Test that accented, CJK and emoji text is recovered whole."""
+        for message in ['Café à demain ?', '明日は雨が降るでしょう', 'Happy birthday 🎉🎂']:
+            blob = b'\x84\x08NSString\x01\x94\x84\x01+\x05' + message.encode('utf-8') + b'\x86\x84'
+            assert _longest_candidate(blob) == message
+
+    def test_invalid_utf8_splits_runs(self):
+        """Test that malformed UTF-8 sequences end a run."""
+        blob = b'\x01valid text\xe3\x81more valid text\xff'
+        assert _longest_candidate(blob) == 'more valid text'
+
+    def test_short_and_empty_blobs(self):
+        """Test that blobs without a long enough run return None."""
+        assert _longest_candidate(b'') is None
+        assert _longest_candidate(b'\x01hello\x02') is None
+
+
+def make_streamtyped(text: str, length_prefix: bytes = None) -> bytes:
+    """Build a minimal typedstream attributedBody holding the given text."""
+    payload = text.encode('utf-8')
+    if length_prefix is None:
+        length_prefix = bytes([len(payload)])
+    return (b'\x04\x0bstreamtyped\x81\xe8\x03\x84\x01@\x84\x84\x84\x12NSAttributedString\x00'
+            b'\x84\x84\x08NSObject\x00\x85\x92\x84\x84\x84\x08NSString\x01\x94\x84\x01+'
+            + length_prefix + payload + b'\x86\x84\x02iI\x01\x05\x92\x84\x84\x84\x0cNSDictionary\x00')
+
+
+class TestDecodeStreamtyped:
+    """Tests for the direct typedstream NSString reader."""
+
+    def test_short_string(self):
+        """Test a string with a single-byte length."""
+        assert _decode_streamtyped(make_streamtyped('ok')) == 'ok'
+
+    def test_long_string(self):
+        """Test a string with a 0x81 16-bit length prefix."""
+        text = 'Long message. ' * 30
+        blob = make_streamtyped(text, b'\x81' + len(text.encode()).to_bytes(2, 'little'))
+        assert _decode_streamtyped(blob) == text
+
+    def test_non_ascii_string(self):
+        """Test that the payload is decoded as UTF-8."""
+        assert _decode_streamtyped(make_streamtyped('À bientôt 👋')) == 'À bientôt 👋'
+
+    def test_mutable_string_chain(self):
+        """Test an NSMutableString whose NSString superclass record precedes the text."""
+        blob = (b'\x04\x0bstreamtyped\x81\xe8\x03\x84\x01@\x84\x84\x84\x19NSMutableAttributedString\x00'
+                b'\x84\x84\x12NSAttributedString\x00\x84\x84\x08NSObject\x00\x85\x92'
+                b'\x84\x84\x84\x0fNSMutableString\x01\x84\x84\x08NSString\x01\x95\x84\x01+'
+                b'\x0dHello friend!\x86\x84\x02iI\x01\x0d\x92\x84\x84\x84\x0cNSDictionary\x00')
+        assert _decode_streamtyped(blob) == 'Hello friend!'
+        assert _decode_attributed_body(blob) == 'Hello friend!'
+
+    def test_control_tag_instead_of_length(self):
+        """Test that typedstream control tags after the type code aren't read as lengths."""
+        for tag in (b'\x80', b'\x83', b'\x86', b'\xff'):
+            assert _decode_streamtyped(make_streamtyped('x' * 200, tag)) is None
+
+    def test_unexpected_layout(self):
+        """Test that blobs without the NSString layout return None."""
+        assert _decode_streamtyped(b'\x04\x0bstreamtyped\x84\x08NSObject\x00') is None
+        assert _decode_streamtyped(b'\x84\x08NSString\x01\x94\x84\x01+\x20short') is None
+
+    def test_streamtyped_skips_bpylist2(self, test_db, capsys):
+        """Test that typedstream blobs are decoded without calling bpylist2."""
+        conn = sqlite3.connect(test_db)
+        conn.execute("""
+            INSERT INTO message (ROWID, text, attributedBody, date, is_from_me)
+            VALUES (8, NULL, ?, 7000000000, 0)
+        """, (make_streamtyped('ok'),))
+        conn.execute("INSERT INTO chat_message_join (chat_id, message_id) VALUES (1, 8)")
+        conn.commit()
+        conn.close()
+
+        with patch('extract_messages.archiver.unarchive') as mock_unarchive:
+            extract_messages(test_db, '+15551234567')
+            mock_unarchive.assert_not_called()
+        captured = capsys.readouterr()
+
+        assert 'Them: ok' in captured.out
+
+    def test_streamtyped_in_debug_mode(self, test_db, capsys):
+        """Test that debug mode decodes typedstream blobs the same way."""
+        conn = sqlite3.connect(test_db)
+        conn.execute("""
+            INSERT INTO message (ROWID, text, attributedBody, date, is_from_me)
+            VALUES (8, NULL, ?, 7000000000, 0)
+        """, (make_streamtyped('ok'),))
+        conn.execute("INSERT INTO chat_message_join (chat_id, message_id) VALUES (1, 8)")
+        conn.commit()
+        conn.close()
+
+        extract_messages(test_db, '+15551234567', debug=True)
+        captured = capsys.readouterr()
+
+        assert 'Streamtyped: True' in captured.out
+        assert 'Them: ok' in captured.out